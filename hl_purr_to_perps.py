@@ -3,14 +3,25 @@ from __future__ import annotations
 import os
 import sys
 import time
+import hashlib
 import argparse
-from decimal import Decimal, ROUND_DOWN, getcontext
-from typing import Dict, Tuple
+import tempfile
+import threading
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal, getcontext
+from typing import TYPE_CHECKING, Dict, Optional, Tuple
 from dotenv import load_dotenv
 
-import requests
-from hyperliquid.exchange import Exchange
-import eth_account
+import httpx
+import ijson
+import orjson
+import websocket
+
+if TYPE_CHECKING:
+    # Signing stack (SDK + eth_account) is imported lazily where it's needed:
+    # it dominates startup time and --help / config errors never touch it.
+    from hyperliquid.exchange import Exchange
 
 
 load_dotenv()
@@ -23,30 +34,188 @@ DEFAULT_SIGNATURE_CHAIN_ID_MAINNET = "0xa4b1"  # Arbitrum One
 DEFAULT_SIGNATURE_CHAIN_ID_TESTNET = "0x66eee"  # Arbitrum Sepolia
 
 
+@dataclass(frozen=True, slots=True)
+class Config:
+    """Settings resolved once from the environment (.env included)."""
+
+    account_address: str
+    secret_key: str = field(repr=False)
+    api_url: str
+    is_testnet: bool
+    sig_chain_id: str
+    hyper_chain: str
+    pair_name: str
+    base_token: str
+    quote_token: str
+
+    @classmethod
+    def from_env(cls) -> "Config":
+        account_address = os.getenv("HL_ACCOUNT_ADDRESS")
+        secret_key = os.getenv("HL_SECRET_KEY")
+        if not account_address or not secret_key:
+            sys.exit("Set HL_ACCOUNT_ADDRESS and HL_SECRET_KEY in your environment.")
+
+        api_url = os.getenv("HL_API_URL", MAINNET_API)
+        is_testnet = api_url.endswith("-testnet.xyz")
+        return cls(
+            account_address=account_address,
+            secret_key=secret_key,
+            api_url=api_url,
+            is_testnet=is_testnet,
+            sig_chain_id=os.getenv(
+                "HL_SIGNATURE_CHAIN_ID",
+                (
+                    DEFAULT_SIGNATURE_CHAIN_ID_TESTNET
+                    if is_testnet
+                    else DEFAULT_SIGNATURE_CHAIN_ID_MAINNET
+                ),
+            ),
+            hyper_chain="Testnet" if is_testnet else "Mainnet",
+            pair_name=os.getenv("PAIR_NAME", "PURR/USDC"),
+            base_token=os.getenv("BASE_TOKEN", "PURR"),
+            quote_token=os.getenv("QUOTE_TOKEN", "USDC"),
+        )
+
+
 getcontext().prec = 28
 
 # ---------- Helpers for public Info endpoints (no signing required) ----------
 INFO_URL = "/info"
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "hl_purr")
+SPOT_META_TTL = 3600  # seconds; spot tokens/universe change rarely
+INFO_TIMEOUT = httpx.Timeout(10, connect=3)  # fail fast on a hung connect
+INFO_RETRIES = 3  # /info is read-only, so transient failures are safe to retry
+
+
+def _read_cache(path: str):
+    try:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+    except (OSError, ValueError):
+        return None  # missing or corrupt cache
+
+
+def _write_cache(path: str, obj):
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(orjson.dumps(obj))
+        os.replace(tmp, path)  # atomic: readers never see a partial file
+    except OSError:
+        pass  # caching is best-effort
 
 
 class InfoClient:
     def __init__(self, api_url: str):
         self.api_url = api_url.rstrip("/")
+        # One pooled HTTP/2 client: repeated /info calls skip the TLS handshake
+        # and concurrent ones are multiplexed over a single connection.
+        # httpx negotiates gzip (and br/zstd when their decoders are installed).
+        self.client = httpx.Client(
+            http2=True,
+            timeout=INFO_TIMEOUT,
+            limits=httpx.Limits(max_connections=10, max_keepalive_connections=4),
+        )
+
+    def _with_retries(self, fn):
+        """Call fn, retrying connection errors, timeouts and 5xx with exponential backoff."""
+        for attempt in range(INFO_RETRIES):
+            try:
+                return fn()
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code < 500 or attempt == INFO_RETRIES - 1:
+                    raise
+            except httpx.TransportError:
+                if attempt == INFO_RETRIES - 1:
+                    raise
+            time.sleep(0.25 * 2**attempt)
 
     def _post(self, payload: dict):
-        r = requests.post(self.api_url + INFO_URL, json=payload, timeout=20)
-        r.raise_for_status()
-        return r.json()
+        def send():
+            r = self.client.post(
+                self.api_url + INFO_URL,
+                content=orjson.dumps(payload),
+                headers={"Content-Type": "application/json"},
+            )
+            r.raise_for_status()
+            return orjson.loads(r.content)
+
+        return self._with_retries(send)
 
     def spot_meta(self):
         return self._post({"type": "spotMeta"})
 
+    def _spot_meta_cache_path(self) -> str:
+        key = hashlib.sha256(self.api_url.encode()).hexdigest()[:16]
+        return os.path.join(CACHE_DIR, f"spot_meta_{key}.json")
+
+    def _store_spot_meta(self, meta: dict):
+        _write_cache(self._spot_meta_cache_path(), meta)
+
+    def spot_meta_cached(self, ttl: int = SPOT_META_TTL, refresh: bool = False):
+        """spotMeta, served from a per-api_url file cache while younger than ttl."""
+        path = self._spot_meta_cache_path()
+        if not refresh:
+            try:
+                fresh = time.time() - os.path.getmtime(path) < ttl
+            except OSError:
+                fresh = False
+            meta = _read_cache(path) if fresh else None
+            if meta is not None:
+                return meta
+
+        meta = self.spot_meta()
+        self._store_spot_meta(meta)
+        return meta
+
     def spot_meta_and_ctxs(self):
         return self._post({"type": "spotMetaAndAssetCtxs"})
 
+    def bootstrap(self):
+        """Fresh (spotMeta, assetCtxs) in one round-trip; also refreshes the meta cache."""
+        meta, ctxs = self.spot_meta_and_ctxs()
+        self._store_spot_meta(meta)
+        return meta, ctxs
+
     def spot_balances(self, address: str):
         return self._post({"type": "spotClearinghouseState", "user": address})
 
+    def all_spot_balances(self, address: str) -> Dict[str, Decimal]:
+        """Free balance of every coin the account holds on Spot, from one request."""
+        state = self.spot_balances(address)
+        return {b["coin"]: entry_free(b) for b in state.get("balances", [])}
+
+    def spot_balance_of(self, address: str, coin: str) -> Optional[dict]:
+        """Single balance entry for coin, parsed incrementally from the response stream.
+
+        Stops reading as soon as the coin is found instead of materializing
+        every balance the account holds.
+        """
+
+        def send():
+            items = ijson.sendable_list()
+            parser = ijson.items_coro(items, "balances.item")
+            with self.client.stream(
+                "POST",
+                self.api_url + INFO_URL,
+                content=orjson.dumps({"type": "spotClearinghouseState", "user": address}),
+                headers={"Content-Type": "application/json"},
+            ) as r:
+                r.raise_for_status()
+                for chunk in r.iter_bytes():
+                    parser.send(chunk)
+                    for b in items:
+                        if b.get("coin") == coin:
+                            return b
+                    del items[:]
+            return None
+
+        return self._with_retries(send)
+
+    def order_status(self, address: str, oid: int):
+        return self._post({"type": "orderStatus", "user": address, "oid": oid})
+
     def l2_book(self, coin: str):
         # coin for spot must be PAIR_NAME like "PURR/USDC"
         return self._post({"type": "l2Book", "coin": coin})
@@ -55,25 +224,92 @@ class InfoClient:
 # ---------- Trading/Transfer helpers (signed via SDK) ----------
 
 
-def build_exchange(account_address: str, account: str, api_url: str):
-    # Exchange() signs and sends /exchange actions for us
-    return Exchange(account, api_url, account_address=account_address)
+def load_account(secret_key: str):
+    import eth_account
+
+    return eth_account.Account.from_key(secret_key)
+
+
+_DOMAIN_HASHES: Dict[tuple, bytes] = {}
 
 
-def find_pair_asset_id(meta: dict, pair_name: str):
+def _sign_inner_cached(wallet, data: dict):
+    """The SDK's sign_inner, hashing each EIP-712 domain separator only once per run."""
+    from eth_account.messages import SignableMessage, hash_domain, hash_eip712_message
+    from eth_utils import to_hex
+
+    domain = data["domain"]
+    key = tuple(sorted(domain.items()))
+    header = _DOMAIN_HASHES.get(key)
+    if header is None:
+        header = _DOMAIN_HASHES.setdefault(key, hash_domain(domain))
+    types = {k: v for k, v in data["types"].items() if k != "EIP712Domain"}
+    signable = SignableMessage(b"\x01", header, hash_eip712_message(types, data["message"]))
+    signed = wallet.sign_message(signable)
+    return {"r": to_hex(signed["r"]), "s": to_hex(signed["s"]), "v": signed["v"]}
+
+
+def build_exchange(account_address: str, account: str, api_url: str, spot_meta: dict):
+    from hyperliquid.exchange import Exchange
+    from hyperliquid.utils import signing
+
+    # Every sign_* helper in the SDK funnels through signing.sign_inner, which
+    # rebuilds and validates the full typed-data payload per action.
+    signing.sign_inner = _sign_inner_cached
+
+    # Exchange() signs and sends /exchange actions for us. Without meta/spot_meta
+    # its Info would fetch both before the first action; we already hold spot
+    # meta, and this script never trades perps, so an empty perp universe is
+    # all it needs.
+    return Exchange(
+        account,
+        api_url,
+        meta={"universe": []},
+        account_address=account_address,
+        spot_meta=spot_meta,
+    )
+
+
+def index_meta(meta: dict) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+    """Build (tokens by name, universe pairs by name) lookups from spot meta."""
+    tok_by_name = {t["name"]: t for t in meta.get("tokens", [])}
+    pair_by_name = {u["name"]: u for u in meta.get("universe", [])}
+    return tok_by_name, pair_by_name
+
+
+def find_pair_asset_id(pair_by_name: Dict[str, dict], pair_name: str):
     """Asset id for spot = 10000 + index in spotMeta.universe"""
-    for u in meta.get("universe", []):
-        if u.get("name") == pair_name:
-            return 10000 + int(u["index"])  # type: ignore[index]
-    raise RuntimeError(f"Pair {pair_name} not found in spot meta 'universe'.")
+    u = pair_by_name.get(pair_name)
+    if u is None:
+        raise RuntimeError(f"Pair {pair_name} not found in spot meta 'universe'.")
+    return 10000 + int(u["index"])
 
 
-def token_decimals(meta: dict, token: str) -> Tuple[int, int]:
+def token_decimals(tok_by_name: Dict[str, dict], token: str) -> Tuple[int, int]:
     """Return (szDecimals, weiDecimals) for a token name."""
-    for t in meta.get("tokens", []):
-        if t.get("name") == token:
-            return int(t["szDecimals"]), int(t["weiDecimals"])  # type: ignore[index]
-    raise RuntimeError(f"Token {token} not found in spot meta 'tokens'.")
+    t = tok_by_name.get(token)
+    if t is None:
+        raise RuntimeError(f"Token {token} not found in spot meta 'tokens'.")
+    return int(t["szDecimals"]), int(t["weiDecimals"])
+
+
+def resolve_constants(
+    meta: dict, pair_name: str, base_token: str, quote_token: str
+) -> Tuple[int, int, int]:
+    """(base szDecimals, quote weiDecimals, pair asset id) for the configured pair."""
+    tok_by_name, pair_by_name = index_meta(meta)
+    purr_sz_decimals, _ = token_decimals(tok_by_name, base_token)
+    _, usdc_wei_decimals = token_decimals(tok_by_name, quote_token)
+    pair_asset_id = find_pair_asset_id(pair_by_name, pair_name)
+    return purr_sz_decimals, usdc_wei_decimals, pair_asset_id
+
+
+def pair_mid_px(ctxs: list, pair_name: str):
+    """Mid price of pair_name from spot asset ctxs, or None if unavailable."""
+    for ctx in ctxs:
+        if ctx.get("coin") == pair_name and ctx.get("midPx") is not None:
+            return float(ctx["midPx"])
+    return None
 
 
 def best_bid_ask(info: InfoClient, pair_name: str) :
@@ -88,55 +324,406 @@ def best_bid_ask(info: InfoClient, pair_name: str) :
 
 
 def get_spot_balance(info: InfoClient, address: str, token: str):
-    state = info.spot_balances(address)
+    b = info.spot_balance_of(address, token)
+    return entry_free(b) if b else Decimal("0")
+
+
+def entry_free(b: dict) -> Decimal:
+    """Free (total - hold) amount of a single spot balance entry."""
+    return Decimal(str(b.get("total", "0"))) - Decimal(str(b.get("hold", "0")))
+
+
+def free_balance(state: dict, token: str):
+    """Free (total - hold) balance of token in a spotClearinghouseState response."""
     total = Decimal("0")
     for b in state.get("balances", []):
         if b.get("coin") == token:
             # prefer free = total - hold
-            total = Decimal(str(b.get("total", "0"))) - Decimal(str(b.get("hold", "0")))
+            total = entry_free(b)
             break
     return total
 
 
-def round_size(sz: Decimal, sz_decimals: int):
-    if sz_decimals == 0:
-        return str(int(sz))
-    q = Decimal(8) ** (-sz_decimals)
-    return str((sz // q) * q)  # floor to step
+class SpotBalanceWatcher:
+    """Watch one token's free spot balance over the webData2 WS feed until it rises above baseline."""
+
+    def __init__(self, api_url: str, address: str, token: str, baseline: Decimal):
+        self.address = address
+        self.token = token
+        self.baseline = baseline
+        self.balance: Optional[Decimal] = None
+        # Set once the balance has increased or the connection is gone, so
+        # wait() never sits out its timeout on a dead socket.
+        self._done = threading.Event()
+        ws_url = "ws" + api_url.rstrip("/")[len("http"):] + "/ws"
+        self._ws = websocket.WebSocketApp(
+            ws_url,
+            on_open=self._on_open,
+            on_message=self._on_message,
+            # on_error is deliberately not wired: websocket-client also routes
+            # exceptions raised by our own callbacks there. A failed connect
+            # ends run_forever, which _run turns into "done".
+            on_close=self._on_closed,
+        )
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self._ws.run_forever()
+        finally:
+            self._done.set()
+
+    def _on_closed(self, ws, *args):
+        self._done.set()
+
+    def _on_open(self, ws):
+        ws.send(
+            orjson.dumps(
+                {"method": "subscribe", "subscription": {"type": "webData2", "user": self.address}}
+            ).decode()
+        )
+
+    def _on_message(self, ws, message):
+        try:
+            msg = orjson.loads(message)
+        except orjson.JSONDecodeError:
+            return  # e.g. the plain-text "Websocket connection established." greeting
+        if not isinstance(msg, dict) or msg.get("channel") != "webData2":
+            return  # e.g. subscriptionResponse
+        state = msg.get("data", {}).get("spotState")
+        if not state:
+            return
+        free = free_balance(state, self.token)
+        if free > self.baseline:
+            self.balance = free
+            self._done.set()
+
+    def wait(self, timeout: float) -> Optional[Decimal]:
+        """New free balance once it has increased, or None on timeout or a closed/failed connection."""
+        self._done.wait(timeout)
+        return self.balance
+
+    def close(self):
+        self._ws.close()
+
+
+_SCALES: Dict[int, int] = {}
+
+
+def scale(decimals: int) -> int:
+    """Units per whole token (10**decimals), computed once per decimals value."""
+    try:
+        return _SCALES[decimals]
+    except KeyError:
+        return _SCALES.setdefault(decimals, 10**decimals)
+
+
+def to_units(amount: Decimal, decimals: int) -> int:
+    """Floor a non-negative amount to an integer count of 10**-decimals units."""
+    if amount <= 0:
+        return 0
+    whole, _, frac = format(amount, "f").partition(".")
+    return int(whole) * scale(decimals) + int(frac[:decimals].ljust(decimals, "0") or 0)
+
+
+def from_units(units: int, decimals: int) -> str:
+    """Render an integer count of 10**-decimals units as a plain decimal string."""
+    if decimals == 0:
+        return str(units)
+    whole, frac = divmod(units, scale(decimals))
+    return f"{whole}.{frac:0{decimals}d}"
+
+
+def units_amount(units: int, decimals: int) -> Tuple[str, float]:
+    """(exact decimal string, float) for an integer count of 10**-decimals units.
+
+    The string is for display; the SDK signs str(float). That drops trailing
+    zeros ("1.00000000" -> "1.0") and only preserves the value up to ~15
+    significant digits: 8-decimal amounts of 1e7 or more can round either
+    way. An amount that rounds up is what the one-wei buffer in
+    safe_transfer_amount absorbs -- the float path itself is not exact.
+    """
+    amount_str = from_units(units, decimals)
+    return amount_str, float(amount_str)
+
+
+def round_size(sz: Decimal, sz_decimals: int) -> Tuple[str, float]:
+    return units_amount(to_units(sz, sz_decimals), sz_decimals)  # floor to step
+
+
+def safe_transfer_amount(amount: Decimal, wei_decimals: int) -> Tuple[str, float]:
+    """Floor to on-chain decimals and subtract one wei as a safety buffer."""
+    return units_amount(max(to_units(amount, wei_decimals) - 1, 0), wei_decimals)
 
 
 def place_spot_ioc_sell(
-    exchange: Exchange, pair_name: str, size_str: str, slippage_bps: int
+    exchange: Exchange, pair_name: str, size: float, slippage: float, px=None
 ):
-    slippage = float(slippage_bps) / 10000.0
+    # px is the reference price the slippage is applied to; when None the SDK
+    # fetches allMids itself
     return exchange.market_open(
         name=pair_name,
         is_buy=False,
-        sz=float(size_str),
+        sz=size,
+        px=px,
         slippage=slippage,
     )
 
 
+def order_oid(res_order: dict) -> Optional[int]:
+    """oid of the first order in an /exchange order response, if it was accepted."""
+    try:
+        status = res_order["response"]["data"]["statuses"][0]
+    except (KeyError, IndexError, TypeError):
+        return None
+    for key in ("filled", "resting"):
+        if key in status:
+            return int(status[key]["oid"])
+    return None
+
+
+def wait_for_order_settled(
+    info: InfoClient, address: str, oid: int, attempts: int = 20, interval: float = 0.1
+):
+    """Poll orderStatus until the order leaves the open state; returns the final status or None."""
+    for _ in range(attempts):
+        order = info.order_status(address, oid).get("order") or {}
+        status = order.get("status")
+        if status is not None and status != "open":
+            return status
+        time.sleep(interval)
+    return None
+
+
 def usd_class_transfer(
     exchange: Exchange,
-    amount_usdc: str,
+    amount_usdc: float,
     to_perp: bool,
     signature_chain_id: str,
     hyperliquid_chain: str,
 ):
     # Use SDK method which signs under the hood
-    return exchange.usd_class_transfer(amount=float(amount_usdc), to_perp=to_perp)
+    return exchange.usd_class_transfer(amount=amount_usdc, to_perp=to_perp)
 
 
 def withdraw3(
     exchange: Exchange,
-    amount_usdc: str,
+    amount_usdc: float,
     destination: str,
     signature_chain_id: str,
     hyperliquid_chain: str,
 ):
     # Use SDK method which signs under the hood
-    return exchange.withdraw_from_bridge(amount=float(amount_usdc), destination=destination)
+    return exchange.withdraw_from_bridge(amount=amount_usdc, destination=destination)
+
+
+class NonceManager:
+    """Strictly increasing millisecond nonces for actions signed back-to-back."""
+
+    def __init__(self):
+        self._last = 0
+        self._lock = threading.Lock()
+
+    def next(self) -> int:
+        with self._lock:
+            self._last = max(self._last + 1, int(time.time() * 1000))
+            return self._last
+
+
+# full_sweep signs its transfer and withdrawal before posting either, which the
+# SDK's Exchange methods (build + sign + post in one call) can't do. The three
+# helpers below mirror Exchange.usd_class_transfer, Exchange.withdraw_from_bridge
+# and Exchange._post_action from hyperliquid-python-sdk so the wire format is
+# identical to the other modes; keep them in step with the SDK.
+
+
+def _usd_class_transfer_action(exchange: Exchange, amount: float, to_perp: bool, nonce: int) -> dict:
+    str_amount = str(amount)
+    if exchange.vault_address:
+        str_amount += f" subaccount:{exchange.vault_address}"
+    return {"type": "usdClassTransfer", "amount": str_amount, "toPerp": to_perp, "nonce": nonce}
+
+
+def _withdraw_from_bridge_action(amount: float, destination: str, nonce: int) -> dict:
+    return {"destination": destination, "amount": str(amount), "time": nonce, "type": "withdraw3"}
+
+
+def _post_signed_action(exchange: Exchange, action: dict, signature: dict, nonce: int):
+    payload = {
+        "action": action,
+        "nonce": nonce,
+        "signature": signature,
+        "vaultAddress": (
+            exchange.vault_address
+            if action["type"] not in ["usdClassTransfer", "sendAsset"]
+            else None
+        ),
+        "expiresAfter": exchange.expires_after,
+    }
+    return exchange.post("/exchange", payload)
+
+
+def transfer_then_withdraw(
+    exchange: Exchange, amount_usdc: float, destination: str, nonces: NonceManager
+):
+    """Spot -> Perps transfer followed by a bridge withdrawal of the same amount.
+
+    Hyperliquid has no batch envelope for user-signed actions, so both are
+    signed up front (concurrently, with distinct nonces) and then posted
+    back-to-back; the withdrawal is only sent if the transfer succeeded.
+    """
+    from hyperliquid.utils.constants import MAINNET_API_URL
+    from hyperliquid.utils.signing import (
+        sign_usd_class_transfer_action,
+        sign_withdraw_from_bridge_action,
+    )
+
+    is_mainnet = exchange.base_url == MAINNET_API_URL
+    xfer_nonce, withdraw_nonce = nonces.next(), nonces.next()
+    xfer = _usd_class_transfer_action(exchange, amount_usdc, True, xfer_nonce)
+    withdraw = _withdraw_from_bridge_action(amount_usdc, destination, withdraw_nonce)
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        xfer_sig = pool.submit(sign_usd_class_transfer_action, exchange.wallet, xfer, is_mainnet)
+        withdraw_sig = pool.submit(
+            sign_withdraw_from_bridge_action, exchange.wallet, withdraw, is_mainnet
+        )
+        res_xfer = _post_signed_action(exchange, xfer, xfer_sig.result(), xfer_nonce)
+        if res_xfer.get("status") != "ok":
+            return res_xfer, None
+        res_w = _post_signed_action(exchange, withdraw, withdraw_sig.result(), withdraw_nonce)
+    return res_xfer, res_w
+
+
+# ---------- Modes ----------
+
+
+def _transfer_amount(usdc_free: Decimal, args, ctx: dict) -> Tuple[str, float]:
+    """usdc_free (or --usdc-amount, if smaller) as a safe on-chain amount string."""
+    usdc_to_xfer = (
+        usdc_free if args.usdc_amount is None else min(args.usdc_amount, usdc_free)
+    )
+    # Use USDC on-chain decimals (wei_decimals), floor and subtract one tick as safety buffer
+    return safe_transfer_amount(usdc_to_xfer, ctx["usdc_wei_decimals"])
+
+
+def _transfer_usdc_spot_to_perp(
+    exchange: Exchange, usdc_free: Decimal, args, cfg: Config, ctx: dict
+):
+    """Move usdc_free (or --usdc-amount, if smaller) from Spot to Perps."""
+    amount_str, amount = _transfer_amount(usdc_free, args, ctx)
+
+    print(f"Transferring {amount_str} USDC from Spot -> Perps...")
+    res_xfer = usd_class_transfer(
+        exchange, amount, True, cfg.sig_chain_id, cfg.hyper_chain
+    )
+    print("Transfer response:", res_xfer)
+
+
+def _sell_base_for_quote(
+    args, cfg: Config, info: InfoClient, exchange: Exchange, ctx: dict
+) -> Decimal:
+    """Sell the base token on spot; returns the free quote balance afterwards."""
+    account_address = cfg.account_address
+    pair_name = cfg.pair_name
+    base_token = cfg.base_token
+    quote_token = cfg.quote_token
+    spot_balances = ctx["spot_balances"]
+
+    # 1) Determine PURR to sell
+    purr_free = spot_balances.get(base_token, Decimal("0"))
+    if purr_free <= 0:
+        sys.exit("No PURR available on Spot.")
+    purr_to_sell = (
+        purr_free if args.purr_amount is None else min(args.purr_amount, purr_free)
+    )
+    purr_size_str, purr_size = round_size(purr_to_sell, ctx["purr_sz_decimals"])
+    if purr_size <= 0:
+        sys.exit("Computed PURR size <= 0 after rounding. Aborting.")
+
+    # 2) Place Market-like IoC via SDK (SDK computes px and snaps to tick size)
+    print(
+        f"Selling {purr_size_str} {base_token} on {pair_name} (IOC market emulation, slippage {args.slippage_bps} bps)..."
+    )
+    # Subscribe before sending the order so the balance update can't be missed
+    watcher = SpotBalanceWatcher(
+        cfg.api_url, account_address, quote_token,
+        spot_balances.get(quote_token, Decimal("0")),
+    ).start()
+    try:
+        res_order = place_spot_ioc_sell(
+            exchange, pair_name, purr_size, args.slippage,
+            px=pair_mid_px(ctx["spot_ctxs"], pair_name),
+        )
+        print("Order response:", res_order)
+
+        usdc_free = None
+        oid = order_oid(res_order)
+        if oid is not None:
+            usdc_free = watcher.wait(timeout=5.0)
+            if usdc_free is None:
+                # No WS confirmation: fall back to HTTP polling
+                wait_for_order_settled(info, account_address, oid)
+    finally:
+        watcher.close()
+
+    if usdc_free is None:
+        usdc_free = get_spot_balance(info, account_address, quote_token)
+    if usdc_free <= 0:
+        sys.exit("No USDC on Spot after sell (order may not have filled).")
+    return usdc_free
+
+
+def sell_then_transfer(args, cfg: Config, info: InfoClient, exchange: Exchange, ctx: dict):
+    usdc_free = _sell_base_for_quote(args, cfg, info, exchange, ctx)
+    # 3) Transfer USDC Spot -> Perps
+    _transfer_usdc_spot_to_perp(exchange, usdc_free, args, cfg, ctx)
+
+
+def full_sweep(args, cfg: Config, info: InfoClient, exchange: Exchange, ctx: dict):
+    if not args.dest:
+        sys.exit("--dest is required for full_sweep mode (Arbitrum address)")
+    usdc_free = _sell_base_for_quote(args, cfg, info, exchange, ctx)
+
+    # 3) Transfer USDC Spot -> Perps and withdraw it, signed together
+    amount_str, amount = _transfer_amount(usdc_free, args, ctx)
+    print(f"Transferring {amount_str} USDC Spot -> Perps and withdrawing to {args.dest}...")
+    res_xfer, res_w = transfer_then_withdraw(exchange, amount, args.dest, NonceManager())
+    print("Transfer response:", res_xfer)
+    if res_w is None:
+        sys.exit("Transfer failed; withdrawal not sent.")
+    print("Withdraw response:", res_w)
+
+
+def transfer_only(args, cfg: Config, info: InfoClient, exchange: Exchange, ctx: dict):
+    # Transfer existing USDC on Spot to Perps
+    usdc_free = ctx["spot_balances"].get(cfg.quote_token, Decimal("0"))
+    if usdc_free <= 0:
+        sys.exit("No USDC available on Spot.")
+    _transfer_usdc_spot_to_perp(exchange, usdc_free, args, cfg, ctx)
+
+
+def do_withdraw(args, cfg: Config, info: InfoClient, exchange: Exchange, ctx: dict):
+    if not args.dest:
+        sys.exit("--dest is required for withdraw mode (Arbitrum address)")
+    if args.usdc_amount is None:
+        sys.exit("--usdc-amount is required for withdraw mode")
+    amount_str, amount = units_amount(to_units(args.usdc_amount, 8), 8)
+    print(f"Withdrawing {amount_str} USDC from Perps to {args.dest}...")
+    res_w = withdraw3(exchange, amount, args.dest, cfg.sig_chain_id, cfg.hyper_chain)
+    print("Withdraw response:", res_w)
+
+
+MODES = {
+    "sell_and_transfer": sell_then_transfer,
+    "transfer_only": transfer_only,
+    "withdraw": do_withdraw,
+    "full_sweep": full_sweep,
+}
+SELL_MODES = ("sell_and_transfer", "full_sweep")
 
 
 # ---------- Orchestration ----------
@@ -148,7 +735,7 @@ def main():
     )
     parser.add_argument(
         "--mode",
-        choices=["sell_and_transfer", "transfer_only", "withdraw"],
+        choices=list(MODES),
         default="sell_and_transfer",
     )
     parser.add_argument(
@@ -167,7 +754,7 @@ def main():
         "--dest",
         type=str,
         default=None,
-        help="Destination EVM address for --mode withdraw (Arbitrum)",
+        help="Destination EVM address for --mode withdraw / full_sweep (Arbitrum)",
     )
     parser.add_argument(
         "--slippage-bps",
@@ -175,121 +762,57 @@ def main():
         default=30,
         help="Price cushion for IOC order (sell at bid*(1 - bps/1e4)).",
     )
-
-    args = parser.parse_args()
-
-    account_address = os.getenv("HL_ACCOUNT_ADDRESS")
-    secret_key = os.getenv("HL_SECRET_KEY")
-    if not account_address or not secret_key:
-        sys.exit("Set HL_ACCOUNT_ADDRESS and HL_SECRET_KEY in your environment.")
-
-    account = eth_account.Account.from_key(secret_key)
-
-    api_url = os.getenv("HL_API_URL", MAINNET_API)
-    is_testnet = api_url.endswith("-testnet.xyz")
-    sig_chain_id = os.getenv(
-        "HL_SIGNATURE_CHAIN_ID",
-        (
-            DEFAULT_SIGNATURE_CHAIN_ID_TESTNET
-            if is_testnet
-            else DEFAULT_SIGNATURE_CHAIN_ID_MAINNET
-        ),
+    parser.add_argument(
+        "--refresh-meta",
+        action="store_true",
+        help="Ignore the on-disk spot meta cache and fetch fresh metadata.",
     )
-    hyper_chain = "Testnet" if is_testnet else "Mainnet"
-
-    info = InfoClient(api_url)
-    meta = info.spot_meta()
-
-    pair_name = os.getenv("PAIR_NAME")
-    base_token = os.getenv("BASE_TOKEN")
-    quote_token = os.getenv("QUOTE_TOKEN")
 
-    # Sanity: decimals and asset id
-    purr_sz_decimals, _ = token_decimals(meta, base_token)
-    usdc_sz_decimals, usdc_wei_decimals = token_decimals(meta, quote_token)
-    pair_asset_id = find_pair_asset_id(meta,pair_name )
-
-    # Build signer/exchange client
-    exchange = build_exchange(account_address=account_address, account=account, api_url=api_url)
-
-    if args.mode == "sell_and_transfer":
-        # 1) Determine PURR to sell
-        purr_free = get_spot_balance(info, account_address, base_token)
-        if purr_free <= 0:
-            sys.exit("No PURR available on Spot.")
-        purr_to_sell = (
-            purr_free if args.purr_amount is None else min(args.purr_amount, purr_free)
-        )
-        purr_size_str = round_size(purr_to_sell, purr_sz_decimals)
-        if Decimal(purr_size_str) <= 0:
-            sys.exit("Computed PURR size <= 0 after rounding. Aborting.")
-
-        # 2) Place Market-like IoC via SDK (SDK computes px and snaps to tick size)
-        print(
-            f"Selling {purr_size_str} {base_token} on {pair_name} (IOC market emulation, slippage {args.slippage_bps} bps)..."
-        )
-        res_order = place_spot_ioc_sell(
-            exchange, pair_name, purr_size_str, args.slippage_bps
-        )
-        print("Order response:", res_order)
-
-        time.sleep(1.2)
-
-        # 3) Transfer USDC Spot -> Perps
-        usdc_free = get_spot_balance(info, account_address, quote_token)
-        if usdc_free <= 0:
-            sys.exit("No USDC on Spot after sell (order may not have filled).")
-        usdc_to_xfer = (
-            usdc_free if args.usdc_amount is None else min(args.usdc_amount, usdc_free)
+    args = parser.parse_args()
+    args.slippage = args.slippage_bps / 10000.0
+
+    cfg = Config.from_env()
+    account = load_account(cfg.secret_key)
+    info = InfoClient(cfg.api_url)
+
+    # Meta and starting balances are independent network round-trips: issue
+    # them concurrently.
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        # The sell path needs a live mid price anyway, so it takes fresh meta
+        # together with the asset ctxs in a single request.
+        meta_f = (
+            pool.submit(info.bootstrap)
+            if args.mode in SELL_MODES
+            else pool.submit(info.spot_meta_cached, refresh=args.refresh_meta)
         )
-        # Use USDC on-chain decimals (wei_decimals), floor and subtract one tick as safety buffer
-        usdc_tick = Decimal(8) ** (-usdc_wei_decimals)
-        safe_amount = (usdc_to_xfer // usdc_tick) * usdc_tick - usdc_tick
-        if safe_amount < Decimal("0"):
-            safe_amount = Decimal("0")
-        amount_str = str(safe_amount.quantize(usdc_tick, rounding=ROUND_DOWN))
-
-
-        print(f"Transferring {amount_str} USDC from Spot -> Perps...")
-        res_xfer = usd_class_transfer(
-            exchange, amount_str, True, sig_chain_id, hyper_chain
+        balances_f = (
+            pool.submit(info.all_spot_balances, cfg.account_address)
+            if args.mode in SELL_MODES + ("transfer_only",)
+            else None
         )
-        print("Transfer response:", res_xfer)
+        if args.mode in SELL_MODES:
+            meta, spot_ctxs = meta_f.result()
+        else:
+            meta, spot_ctxs = meta_f.result(), None
+        spot_balances = balances_f.result() if balances_f else None
+
+    # Build signer/exchange client from the meta we already hold (no network)
+    exchange = build_exchange(
+        account_address=cfg.account_address, account=account, api_url=cfg.api_url, spot_meta=meta
+    )
 
-    elif args.mode == "transfer_only":
-        # Transfer existing USDC on Spot to Perps
-        usdc_free = get_spot_balance(info, account_address, quote_token)
-        if usdc_free <= 0:
-            sys.exit("No USDC available on Spot.")
-        usdc_to_xfer = (
-            usdc_free if args.usdc_amount is None else min(args.usdc_amount, usdc_free)
-        )
-        usdc_tick = Decimal(8) ** (-usdc_wei_decimals)
-        safe_amount = (usdc_to_xfer // usdc_tick) * usdc_tick - usdc_tick
-        if safe_amount < Decimal("0"):
-            safe_amount = Decimal("0")
-        amount_str = str(safe_amount.quantize(usdc_tick, rounding=ROUND_DOWN))
-
-        print(f"Transferring {amount_str} USDC from Spot -> Perps...")
-        res_xfer = usd_class_transfer(
-            exchange, amount_str, True, sig_chain_id, hyper_chain
-        )
-        print("Transfer response:", res_xfer)
-
-    elif args.mode == "withdraw":
-        if not args.dest:
-            sys.exit("--dest is required for withdraw mode (Arbitrum address)")
-        if args.usdc_amount is None:
-            sys.exit("--usdc-amount is required for withdraw mode")
-        amount_str = str(
-            args.usdc_amount.quantize(Decimal("0.00000001"), rounding=ROUND_DOWN)
-        )
-        print(f"Withdrawing {amount_str} USDC from Perps to {args.dest}...")
-        res_w = withdraw3(exchange, amount_str, args.dest, sig_chain_id, hyper_chain)
-        print("Withdraw response:", res_w)
+    # Sanity: decimals and asset id
+    purr_sz_decimals, usdc_wei_decimals, pair_asset_id = resolve_constants(
+        meta, cfg.pair_name, cfg.base_token, cfg.quote_token
+    )
 
-    else:
-        sys.exit("Unknown mode.")
+    ctx = {
+        "purr_sz_decimals": purr_sz_decimals,
+        "usdc_wei_decimals": usdc_wei_decimals,
+        "spot_balances": spot_balances,
+        "spot_ctxs": spot_ctxs,
+    }
+    MODES[args.mode](args, cfg, info, exchange, ctx)
 
 
 if __name__ == "__main__":